@@ -7,12 +7,26 @@ __author__: Conor Heins, Alexander Tschantz, Daphne Demekas, Brennan Klein
 
 """
 
+import os
 import warnings
 import numpy as np
+from functools import partial
 from pymdp import inference, control, learning
 from pymdp import utils, maths
 import copy
 
+# the expensive normalization / policy-consistency checks in ``Agent.__init__`` can be skipped by setting the
+# environment variable PYMDP_SKIP_VALIDATE=1, for workflows that construct many agents whose generative models
+# are known to be correct by construction (e.g. parameter sweeps). Type checks always run.
+_VALIDATE_AGENT = os.environ.get("PYMDP_SKIP_VALIDATE", "0") == "0"
+
+# default parameters for each inference algorithm, resolved once at module load rather than
+# through a per-construction if/elif chain
+DEFAULT_INFERENCE_PARAMS = {
+    "VANILLA": {"num_iter": 10, "dF": 1.0, "dF_tol": 0.001},
+    "MMP": {"num_iter": 10, "grad_descent": True, "tau": 0.25},
+}
+
 class Agent(object):
     """ 
     The Agent class, the highest-level API that wraps together processes for action, perception, and learning under active inference.
@@ -91,10 +105,11 @@ class Agent(object):
 
         self.A = utils.to_obj_array(A)
 
-        assert utils.is_normalized(self.A), "A matrix is not normalized (i.e. A.sum(axis = 0) must all equal 1.0)"
+        if _VALIDATE_AGENT and not utils.is_normalized(self.A):
+            raise AssertionError("A matrix is not normalized (i.e. A.sum(axis = 0) must all equal 1.0)")
 
         # Determine number of observation modalities and their respective dimensions
-        self.num_obs = [self.A[m].shape[0] for m in range(len(self.A))]
+        self.num_obs = [A_m.shape[0] for A_m in self.A]
         self.num_modalities = len(self.num_obs)
 
         # Assigning prior parameters on observation model (pA matrices)
@@ -108,45 +123,60 @@ class Agent(object):
 
         self.B = utils.to_obj_array(B)
 
-        assert utils.is_normalized(self.B), "B matrix is not normalized (i.e. B.sum(axis = 0) must all equal 1.0)"
+        if _VALIDATE_AGENT and not utils.is_normalized(self.B):
+            raise AssertionError("B matrix is not normalized (i.e. B.sum(axis = 0) must all equal 1.0)")
 
         # Determine number of hidden state factors and their dimensionalities
-        self.num_states = [self.B[f].shape[0] for f in range(len(self.B))]
+        self.num_states = [B_f.shape[0] for B_f in self.B]
         self.num_factors = len(self.num_states)
 
         # Assigning prior parameters on transition model (pB matrices) 
         self.pB = pB
 
         # If no `num_controls` are given, then this is inferred from the shapes of the input B matrices
-        if num_controls == None:
-            self.num_controls = [self.B[f].shape[2] for f in range(self.num_factors)]
+        if num_controls is None:
+            self.num_controls = [B_f.shape[2] for B_f in self.B]
         else:
             self.num_controls = num_controls
-        
+
+        # integer view of num_controls, built once and shared by the vectorized consistency checks below
+        num_controls_arr = np.asarray(self.num_controls)
+
         # Users have the option to make only certain factors controllable.
         # default behaviour is to make all hidden state factors controllable
         # (i.e. self.num_states == self.num_controls)
-        if control_fac_idx == None:
+        if control_fac_idx is None:
             self.control_fac_idx = [f for f in range(self.num_factors) if self.num_controls[f] > 1]
         else:
 
-            assert max(control_fac_idx) <= (self.num_factors - 1), "Check control_fac_idx - must be consistent with `num_states` and `num_factors`..."
+            control_fac_arr = np.asarray(control_fac_idx)
+            if control_fac_arr.max() > (self.num_factors - 1):
+                raise AssertionError("Check control_fac_idx - must be consistent with `num_states` and `num_factors`...")
             self.control_fac_idx = control_fac_idx
 
-            for factor_idx in self.control_fac_idx:
-                assert self.num_controls[factor_idx] > 1, "Control factor (and B matrix) dimensions are not consistent with user-given control_fac_idx"
+            # check all the controllable factors' dimensions in one fancy-indexed comparison
+            if not np.all(num_controls_arr[control_fac_arr] > 1):
+                raise AssertionError("Control factor (and B matrix) dimensions are not consistent with user-given control_fac_idx")
 
         # Again, the use can specify a set of possible policies, or
         # all possible combinations of actions and timesteps will be considered
-        if policies == None:
+        policies_auto_constructed = policies is None
+        if policies_auto_constructed:
             policies = self._construct_policies()
         self.policies = policies
 
-        assert all([len(self.num_controls) == policy.shape[1] for policy in self.policies]), "Number of control states is not consistent with policy dimensionalities"
-        
-        all_policies = np.vstack(self.policies)
+        # policies generated by self._construct_policies() are consistent with num_controls by construction,
+        # so the O(num_policies) consistency checks below only need to run for user-provided policies
+        if _VALIDATE_AGENT and not policies_auto_constructed:
+
+            num_control_factors = len(self.num_controls)
+            if not all(policy.shape[1] == num_control_factors for policy in self.policies):
+                raise AssertionError("Number of control states is not consistent with policy dimensionalities")
+
+            all_policies = np.vstack(self.policies)
 
-        assert all([n_c >= max_action for (n_c, max_action) in zip(self.num_controls, list(np.max(all_policies, axis =0)+1))]), "Maximum number of actions is not consistent with `num_controls`"
+            if not np.all(np.max(all_policies, axis = 0) + 1 <= num_controls_arr):
+                raise AssertionError("Maximum number of actions is not consistent with `num_controls`")
 
         # Construct prior preferences (uniform if not specified)
 
@@ -157,10 +187,13 @@ class Agent(object):
                 )
             self.C = utils.to_obj_array(C)
 
-            assert len(self.C) == self.num_modalities, f"Check C vector: number of sub-arrays must be equal to number of observation modalities: {self.num_modalities}"
+            if len(self.C) != self.num_modalities:
+                raise AssertionError(f"Check C vector: number of sub-arrays must be equal to number of observation modalities: {self.num_modalities}")
 
-            for modality, c_m in enumerate(self.C):
-                assert c_m.shape[0] == self.num_obs[modality], f"Check C vector: number of rows of C vector for modality {modality} should be equal to {self.num_obs[modality]}"
+            # compare the leading dimensions of all modalities at once, rather than checking one modality at a time
+            C_dims = [c_m.shape[0] for c_m in self.C]
+            if C_dims != list(self.num_obs):
+                raise AssertionError(f"Check C vector: number of rows of C vector for each modality should equal {list(self.num_obs)}, but got {C_dims}")
         else:
             self.C = self._construct_C_prior()
 
@@ -173,17 +206,21 @@ class Agent(object):
                 )
             self.D = utils.to_obj_array(D)
 
-            assert len(self.D) == self.num_factors, f"Check D vector: number of sub-arrays must be equal to number of hidden state factors: {self.num_factors}"
+            if len(self.D) != self.num_factors:
+                raise AssertionError(f"Check D vector: number of sub-arrays must be equal to number of hidden state factors: {self.num_factors}")
 
-            for f, d_f in enumerate(self.D):
-                assert d_f.shape[0] == self.num_states[f], f"Check D vector: number of entries of D vector for factor {f} should be equal to {self.num_states[f]}"
+            # compare the leading dimensions of all factors at once, rather than checking one factor at a time
+            D_dims = [d_f.shape[0] for d_f in self.D]
+            if D_dims != list(self.num_states):
+                raise AssertionError(f"Check D vector: number of entries of D vector for each factor should equal {list(self.num_states)}, but got {D_dims}")
         else:
             if pD is not None:
                 self.D = utils.norm_dist_obj_arr(pD)
             else:
                 self.D = self._construct_D_prior()
 
-        assert utils.is_normalized(self.D), "A matrix is not normalized (i.e. A.sum(axis = 0) must all equal 1.0"
+        if _VALIDATE_AGENT and not utils.is_normalized(self.D):
+            raise AssertionError("D vector is not normalized (i.e. D.sum(axis = 0) must all equal 1.0)")
 
         # Assigning prior parameters on initial hidden states (pD vectors)
         self.pD = pD
@@ -196,7 +233,8 @@ class Agent(object):
                 )
             self.E = E
 
-            assert len(self.E) == len(self.policies), f"Check E vector: length of E must be equal to number of policies: {len(self.policies)}"
+            if len(self.E) != len(self.policies):
+                raise AssertionError(f"Check E vector: length of E must be equal to number of policies: {len(self.policies)}")
 
         else:
             self.E = self._construct_E_prior()
@@ -214,7 +252,7 @@ class Agent(object):
                 )
                 self.edge_handling_params['use_BMA'] = False
         
-        if inference_algo == None:
+        if inference_algo is None:
             self.inference_algo = "VANILLA"
             self.inference_params = self._get_default_params()
             if inference_horizon > 1:
@@ -230,6 +268,22 @@ class Agent(object):
             self.inference_params = self._get_default_params()
             self.inference_horizon = inference_horizon
 
+        # bind the inference routine together with its fixed algorithm parameters once,
+        # so that per-timestep calls to `infer_states` don't have to re-assemble them
+        if self.inference_algo == "VANILLA":
+            self._infer_states_fn = partial(
+                inference.update_posterior_states,
+                num_obs = self.num_obs,
+                num_states = self.num_states,
+                **self.inference_params
+            )
+        elif self.inference_algo == "MMP":
+            self._infer_states_fn = partial(
+                inference.update_posterior_states_full,
+                policy_sep_prior = self.edge_handling_params['policy_sep_prior'],
+                **self.inference_params
+            )
+
         if save_belief_hist:
             self.qs_hist = []
             self.q_pi_hist = []
@@ -268,7 +322,7 @@ class Agent(object):
         return num_controls
     
     def _construct_E_prior(self):
-        E = np.ones(len(self.policies)) / len(self.policies)
+        E = np.full(len(self.policies), 1.0 / len(self.policies))
         return E
 
     def reset(self, init_qs=None):
@@ -426,11 +480,10 @@ class Agent(object):
                 )[0]
             else:
                 empirical_prior = self.D
-            qs = inference.update_posterior_states(
-            self.A,
-            observation,
-            empirical_prior,
-            **self.inference_params
+            qs = self._infer_states_fn(
+                self.A,
+                observation,
+                empirical_prior
             )
         elif self.inference_algo == "MMP":
 
@@ -442,18 +495,16 @@ class Agent(object):
                 latest_obs = self.prev_obs
                 latest_actions = self.prev_actions
 
-            qs, F = inference.update_posterior_states_full(
+            qs, F = self._infer_states_fn(
                 self.A,
                 self.B,
                 latest_obs,
-                self.policies, 
-                latest_actions, 
-                prior = self.latest_belief, 
-                policy_sep_prior = self.edge_handling_params['policy_sep_prior'],
-                **self.inference_params
+                self.policies,
+                latest_actions,
+                prior = self.latest_belief
             )
 
-            self.F = F # variational free energy of each policy  
+            self.F = F # variational free energy of each policy
 
         if hasattr(self, "qs_hist"):
             self.qs_hist.append(qs)
@@ -742,21 +793,13 @@ class Agent(object):
 
     def _get_default_params(self):
         method = self.inference_algo
-        default_params = None
-        if method == "VANILLA":
-            default_params = {"num_iter": 10, "dF": 1.0, "dF_tol": 0.001}
-        elif method == "MMP":
-            default_params = {"num_iter": 10, "grad_descent": True, "tau": 0.25}
-        elif method == "VMP":
-            raise NotImplementedError("VMP is not implemented")
-        elif method == "BP":
-            raise NotImplementedError("BP is not implemented")
-        elif method == "EP":
-            raise NotImplementedError("EP is not implemented")
-        elif method == "CV":
-            raise NotImplementedError("CV is not implemented")
-
-        return default_params
+        if method in ("VMP", "BP", "EP", "CV"):
+            raise NotImplementedError(f"{method} is not implemented")
+
+        default_params = DEFAULT_INFERENCE_PARAMS.get(method)
+
+        # hand out a copy, so that per-agent tweaks to `inference_params` can never leak into the module-level defaults
+        return dict(default_params) if default_params is not None else None
 
     
     
@@ -65,7 +65,7 @@ def run_vanilla_fpi(A, obs, num_obs, num_states, prior=None, num_iter=10, dF=1.0
 
     qs = np.empty(n_factors, dtype=object)
     for factor in range(n_factors):
-        qs[factor] = np.ones(num_states[factor]) / num_states[factor]
+        qs[factor] = np.full(num_states[factor], 1.0 / num_states[factor])
 
     """
     If prior is not provided, initialise prior to be identical to posterior 
@@ -103,12 +103,17 @@ def run_vanilla_fpi(A, obs, num_obs, num_states, prior=None, num_iter=10, dF=1.0
         """
 
         curr_iter = 0
+
+        # the einsum subscripts only depend on the number of factors, so build them once outside the iteration loop
+        joint_dims = list(range(n_factors))
+        factor_dims = [[factor] for factor in range(n_factors)]
+
         while curr_iter < num_iter and dF >= dF_tol:
             # Initialise variational free energy
             vfe = 0
 
-            # arg_list = [likelihood, list(range(n_factors))]
-            # arg_list = arg_list + list(chain(*([qs_i,[i]] for i, qs_i in enumerate(qs)))) + [list(range(n_factors))]
+            # arg_list = [likelihood, joint_dims]
+            # arg_list = arg_list + list(chain(*([qs_i,[i]] for i, qs_i in enumerate(qs)))) + [joint_dims]
             # LL_tensor = np.einsum(*arg_list)
 
             qs_all = qs[0]
@@ -117,8 +122,8 @@ def run_vanilla_fpi(A, obs, num_obs, num_states, prior=None, num_iter=10, dF=1.0
             LL_tensor = likelihood * qs_all
 
             for factor, qs_i in enumerate(qs):
-                # qL = np.einsum(LL_tensor, list(range(n_factors)), 1.0/qs_i, [factor], [factor])
-                qL = np.einsum(LL_tensor, list(range(n_factors)), [factor])/qs_i
+                # qL = np.einsum(LL_tensor, joint_dims, 1.0/qs_i, factor_dims[factor], factor_dims[factor])
+                qL = np.einsum(LL_tensor, joint_dims, factor_dims[factor])/qs_i
                 qs[factor] = softmax(qL + prior[factor])
 
             # List of orders in which marginal posteriors are sequentially multiplied into the joint likelihood:
@@ -227,7 +232,7 @@ def _run_vanilla_fpi_faster(A, obs, n_observations, n_states, prior=None, num_it
 
     qs = np.empty(n_factors, dtype=object)
     for factor in range(n_factors):
-        qs[factor] = np.ones(n_states[factor]) / n_states[factor]
+        qs[factor] = np.full(n_states[factor], 1.0 / n_states[factor])
 
     """
     If prior is not provided, initialise prior to be identical to posterior 
@@ -237,7 +242,7 @@ def _run_vanilla_fpi_faster(A, obs, n_observations, n_states, prior=None, num_it
     if prior is None:
         prior = np.empty(n_factors, dtype=object)
         for factor in range(n_factors):
-            prior[factor] = np.log(np.ones(n_states[factor]) / n_states[factor] + 1e-16)
+            prior[factor] = np.log(np.full(n_states[factor], 1.0 / n_states[factor]) + 1e-16)
 
     """
     =========== Step 3 ===========
@@ -9,7 +9,7 @@ import copy
 
 
 def run_mmp(
-    lh_seq, B, policy, prev_actions=None, prior=None, num_iter=10, grad_descent=True, tau=0.25, last_timestep = False):
+    lh_seq, B, policy, prev_actions=None, prior=None, num_iter=10, grad_descent=True, tau=0.25, last_timestep = False, trans_B = None):
     """
     Marginal message passing scheme for updating marginal posterior beliefs about hidden states over time, 
     conditioned on a particular policy.
@@ -38,7 +38,11 @@ def run_mmp(
         Decay constant for use in ``grad_descent`` version. Tunes the size of the gradient descent updates to the posterior.
     last_timestep: Bool, default False
         Flag for whether we are at the last timestep of belief updating
-        
+    trans_B: ``numpy.ndarray`` of dtype object, default None
+        Optional pre-computed transpose-normalized version of ``B`` (one sub-array per hidden state factor). Since this
+        only depends on ``B``, callers that run marginal message passing under many policies can compute it once and
+        pass it in, rather than re-normalizing per policy. If ``None``, it is computed from ``B`` within this function.
+
     Returns
     ---------
     qs_seq: ``numpy.ndarray`` of dtype object
@@ -62,10 +66,12 @@ def run_mmp(
     # dimensions
     _, num_states, _, num_factors = get_model_dimensions(A=None, B=B)
 
-    # beliefs
+    # beliefs: every timestep starts from the same uniform marginals, so allocate those once and
+    # give each timestep a shallow copy of the object array (slots are only ever rebound, never mutated in place)
+    uniform_qs = obj_array_uniform(num_states)
     qs_seq = obj_array(infer_len)
     for t in range(infer_len):
-        qs_seq[t] = obj_array_uniform(num_states)
+        qs_seq[t] = uniform_qs.copy()
 
     # last message
     qs_T = obj_array_zeros(num_states)
@@ -75,64 +81,75 @@ def run_mmp(
         prior = obj_array_uniform(num_states)
 
     # transposed transition
-    trans_B = obj_array(num_factors)
-        
-    for f in range(num_factors):
-        trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
+    if trans_B is None:
+        trans_B = obj_array(num_factors)
+
+        for f in range(num_factors):
+            trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
 
     if prev_actions is not None:
         policy = np.vstack((prev_actions, policy))
 
+    # constant zero log-likelihood messages for future (unobserved) timesteps, allocated once
+    # instead of once per factor/timestep/iteration. These are only ever read, never written to.
+    zero_lnA = obj_array_zeros(num_states)
+
     for itr in range(num_iter):
         F = 0.0 # reset variational free energy (accumulated over time and factors, but reset per iteration)
         for t in range(infer_len):
+
+            # hoist the per-timestep object-array lookups out of the factor loop
+            qs_t = qs_seq[t]
+            qs_past = qs_seq[t - 1] if t > 0 else None
+            qs_next = qs_seq[t + 1] if t < future_cutoff else None
+
             for f in range(num_factors):
                 # likelihood
                 if t < past_len:
-                    lnA = spm_log_single(spm_dot(lh_seq[t], qs_seq[t], [f]))
+                    lnA = spm_log_single(spm_dot(lh_seq[t], qs_t, [f]))
                 else:
-                    lnA = np.zeros(num_states[f])
-                
+                    lnA = zero_lnA[f]
+
                 # past message
                 if t == 0:
                     lnB_past = spm_log_single(prior[f])
                 else:
-                    past_msg = B[f][:, :, int(policy[t - 1, f])].dot(qs_seq[t - 1][f])
+                    past_msg = B[f][:, :, int(policy[t - 1, f])].dot(qs_past[f])
                     lnB_past = spm_log_single(past_msg)
 
                 # future message
                 if t >= future_cutoff:
                     lnB_future = qs_T[f]
                 else:
-                    future_msg = trans_B[f][:, :, int(policy[t, f])].dot(qs_seq[t + 1][f])
+                    future_msg = trans_B[f][:, :, int(policy[t, f])].dot(qs_next[f])
                     lnB_future = spm_log_single(future_msg)
-                
+
                 # inference
                 if grad_descent:
-                    sx = qs_seq[t][f] # save this as a separate variable so that it can be used in VFE computation
+                    sx = qs_t[f] # save this as a separate variable so that it can be used in VFE computation
                     lnqs = spm_log_single(sx)
                     coeff = 1 if (t >= future_cutoff) else 2
                     err = (coeff * lnA + lnB_past + lnB_future) - coeff * lnqs
                     lnqs = lnqs + tau * (err - err.mean())
-                    qs_seq[t][f] = softmax(lnqs)
+                    qs_t[f] = softmax(lnqs)
                     if (t == 0) or (t == (infer_len-1)):
                         F += sx.dot(0.5*err)
                     else:
                         F += sx.dot(0.5*(err - (num_factors - 1)*lnA/num_factors)) # @NOTE: not sure why Karl does this in SPM_MDP_VB_X, we should look into this
                 else:
-                    qs_seq[t][f] = softmax(lnA + lnB_past + lnB_future)
-            
+                    qs_t[f] = softmax(lnA + lnB_past + lnB_future)
+
             if not grad_descent:
 
                 if t < past_len:
-                    F += calc_free_energy(qs_seq[t], prior, num_factors, likelihood = spm_log_single(lh_seq[t]) )
+                    F += calc_free_energy(qs_t, prior, num_factors, likelihood = spm_log_single(lh_seq[t]) )
                 else:
-                    F += calc_free_energy(qs_seq[t], prior, num_factors)
+                    F += calc_free_energy(qs_t, prior, num_factors)
 
     return qs_seq, F
 
 def _run_mmp_testing(
-    lh_seq, B, policy, prev_actions=None, prior=None, num_iter=10, grad_descent=True, tau=0.25, last_timestep = False):
+    lh_seq, B, policy, prev_actions=None, prior=None, num_iter=10, grad_descent=True, tau=0.25, last_timestep = False, trans_B = None):
     """
     Marginal message passing scheme for updating marginal posterior beliefs about hidden states over time, 
     conditioned on a particular policy.
@@ -161,7 +178,11 @@ def _run_mmp_testing(
         Decay constant for use in ``grad_descent`` version. Tunes the size of the gradient descent updates to the posterior.
     last_timestep: Bool, default False
         Flag for whether we are at the last timestep of belief updating
-        
+    trans_B: ``numpy.ndarray`` of dtype object, default None
+        Optional pre-computed transpose-normalized version of ``B`` (one sub-array per hidden state factor). Since this
+        only depends on ``B``, callers that run marginal message passing under many policies can compute it once and
+        pass it in, rather than re-normalizing per policy. If ``None``, it is computed from ``B`` within this function.
+
     Returns
     ---------
     qs_seq: ``numpy.ndarray`` of dtype object
@@ -191,10 +212,12 @@ def _run_mmp_testing(
     # dimensions
     _, num_states, _, num_factors = get_model_dimensions(A=None, B=B)
 
-    # beliefs
+    # beliefs: every timestep starts from the same uniform marginals, so allocate those once and
+    # give each timestep a shallow copy of the object array (slots are only ever rebound, never mutated in place)
+    uniform_qs = obj_array_uniform(num_states)
     qs_seq = obj_array(infer_len)
     for t in range(infer_len):
-        qs_seq[t] = obj_array_uniform(num_states)
+        qs_seq[t] = uniform_qs.copy()
 
     # last message
     qs_T = obj_array_zeros(num_states)
@@ -204,14 +227,19 @@ def _run_mmp_testing(
         prior = obj_array_uniform(num_states)
 
     # transposed transition
-    trans_B = obj_array(num_factors)
-        
-    for f in range(num_factors):
-        trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
+    if trans_B is None:
+        trans_B = obj_array(num_factors)
+
+        for f in range(num_factors):
+            trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
 
     if prev_actions is not None:
         policy = np.vstack((prev_actions, policy))
 
+    # constant zero log-likelihood messages for future (unobserved) timesteps, allocated once
+    # instead of once per factor/timestep/iteration. These are only ever read, never written to.
+    zero_lnA = obj_array_zeros(num_states)
+
     xn = [] # list for storing beliefs across iterations
     vn = [] # list for storing prediction errors across iterations
 
@@ -228,55 +256,60 @@ def _run_mmp_testing(
             if t == (infer_len - 1):
                 debug_flag = True
 
+            # hoist the per-timestep object-array lookups out of the factor loop
+            qs_t = qs_seq[t]
+            qs_past = qs_seq[t - 1] if t > 0 else None
+            qs_next = qs_seq[t + 1] if t < future_cutoff else None
+
             for f in range(num_factors):
                 # likelihood
                 if t < past_len:
                     # if itr == 0:
                     #     print(f'obs from timestep {t}\n')
-                    lnA = spm_log_single(spm_dot(lh_seq[t], qs_seq[t], [f]))
+                    lnA = spm_log_single(spm_dot(lh_seq[t], qs_t, [f]))
                 else:
-                    lnA = np.zeros(num_states[f])
-                
+                    lnA = zero_lnA[f]
+
                 # past message
                 if t == 0:
                     lnB_past = spm_log_single(prior[f])
                 else:
-                    past_msg = B[f][:, :, int(policy[t - 1, f])].dot(qs_seq[t - 1][f])
+                    past_msg = B[f][:, :, int(policy[t - 1, f])].dot(qs_past[f])
                     lnB_past = spm_log_single(past_msg)
 
                 # future message
                 if t >= future_cutoff:
                     lnB_future = qs_T[f]
                 else:
-                    future_msg = trans_B[f][:, :, int(policy[t, f])].dot(qs_seq[t + 1][f])
+                    future_msg = trans_B[f][:, :, int(policy[t, f])].dot(qs_next[f])
                     lnB_future = spm_log_single(future_msg)
 
                 # inference
                 if grad_descent:
-                    sx = qs_seq[t][f] # save this as a separate variable so that it can be used in VFE computation
+                    sx = qs_t[f] # save this as a separate variable so that it can be used in VFE computation
                     lnqs = spm_log_single(sx)
                     coeff = 1 if (t >= future_cutoff) else 2
                     err = (coeff * lnA + lnB_past + lnB_future) - coeff * lnqs
                     vn_tmp = err - err.mean()
                     lnqs = lnqs + tau * vn_tmp
-                    qs_seq[t][f] = softmax(lnqs)
+                    qs_t[f] = softmax(lnqs)
                     if (t == 0) or (t == (infer_len-1)):
                         F += sx.dot(0.5*err)
                     else:
                         F += sx.dot(0.5*(err - (num_factors - 1)*lnA/num_factors)) # @NOTE: not sure why Karl does this in SPM_MDP_VB_X, we should look into this
-                    
-                    xn_itr_all_factors[f][:,t] = np.copy(qs_seq[t][f])
+
+                    xn_itr_all_factors[f][:,t] = np.copy(qs_t[f])
                     vn_itr_all_factors[f][:,t] = np.copy(vn_tmp)
 
                 else:
-                    qs_seq[t][f] = softmax(lnA + lnB_past + lnB_future)
-            
+                    qs_t[f] = softmax(lnA + lnB_past + lnB_future)
+
             if not grad_descent:
 
                 if t < past_len:
-                    F += calc_free_energy(qs_seq[t], prior, num_factors, likelihood = spm_log_single(lh_seq[t]) )
+                    F += calc_free_energy(qs_t, prior, num_factors, likelihood = spm_log_single(lh_seq[t]) )
                 else:
-                    F += calc_free_energy(qs_seq[t], prior, num_factors)
+                    F += calc_free_energy(qs_t, prior, num_factors)
         xn.append(xn_itr_all_factors)
         vn.append(vn_itr_all_factors)
 
@@ -4,10 +4,10 @@
 # pylint: disable=not-an-iterable
 
 import itertools
+from functools import lru_cache
 import numpy as np
-from pymdp.maths import softmax, softmax_obj_arr, spm_dot, spm_wnorm, spm_MDP_G, spm_log_single, spm_log_obj_array
+from pymdp.maths import softmax, softmax_obj_arr, spm_dot, spm_wnorm_obj_arr, spm_MDP_G, spm_log_single, spm_log_obj_array
 from pymdp import utils
-import copy
 
 def update_posterior_policies_full(
     qs_seq_pi,
@@ -93,29 +93,40 @@ def update_posterior_policies_full(
     G = np.zeros(num_policies)
 
     if F is None:
-        F = spm_log_single(np.ones(num_policies) / num_policies)
+        F = spm_log_single(np.full(num_policies, 1.0 / num_policies))
 
     if E is None:
-        lnE = spm_log_single(np.ones(num_policies) / num_policies)
+        lnE = spm_log_single(np.full(num_policies, 1.0 / num_policies))
     else:
-        lnE = spm_log_single(E) 
+        lnE = spm_log_single(E)
 
+    # pre-process the prior preferences once, since they are identical for every policy
+    if use_utility:
+        C_prob = _tile_and_normalize_C(C, horizon)
+
+    # the Dirichlet novelty terms only depend on the Dirichlet parameters themselves, so resolve which ones are
+    # needed (and precompute their wnorm terms) once for all policies, rather than re-checking inside the loop
+    compute_pA_gain = use_param_info_gain and pA is not None
+    compute_pB_gain = use_param_info_gain and pB is not None
+    if compute_pA_gain:
+        wA = spm_wnorm_obj_arr(pA)
+    if compute_pB_gain:
+        wB = spm_wnorm_obj_arr(pB)
 
     for p_idx, policy in enumerate(policies):
 
         qo_seq_pi[p_idx] = get_expected_obs(qs_seq_pi[p_idx], A)
 
         if use_utility:
-            G[p_idx] += calc_expected_utility(qo_seq_pi[p_idx], C)
-        
+            G[p_idx] += calc_expected_utility(qo_seq_pi[p_idx], C, C_prob)
+
         if use_states_info_gain:
             G[p_idx] += calc_states_info_gain(A, qs_seq_pi[p_idx])
-        
-        if use_param_info_gain:
-            if pA is not None:
-                G[p_idx] += calc_pA_info_gain(pA, qo_seq_pi[p_idx], qs_seq_pi[p_idx])
-            if pB is not None:
-                G[p_idx] += calc_pB_info_gain(pB, qs_seq_pi[p_idx], prior, policy)
+
+        if compute_pA_gain:
+            G[p_idx] += calc_pA_info_gain(pA, qo_seq_pi[p_idx], qs_seq_pi[p_idx], wA)
+        if compute_pB_gain:
+            G[p_idx] += calc_pB_info_gain(pB, qs_seq_pi[p_idx], prior, policy, wB)
 
     q_pi = softmax(G * gamma - F + lnE)
     
@@ -189,25 +200,39 @@ def update_posterior_policies(
     q_pi = np.zeros((n_policies, 1))
 
     if E is None:
-        lnE = spm_log_single(np.ones(n_policies) / n_policies)
+        lnE = spm_log_single(np.full(n_policies, 1.0 / n_policies))
     else:
-        lnE = spm_log_single(E) 
+        lnE = spm_log_single(E)
+
+    # pre-process the prior preferences once per policy depth, since they are shared by all policies of that depth
+    C_prob_per_depth = {}
+
+    # the Dirichlet novelty terms only depend on the Dirichlet parameters themselves, so resolve which ones are
+    # needed (and precompute their wnorm terms) once for all policies, rather than re-checking inside the loop
+    compute_pA_gain = use_param_info_gain and pA is not None
+    compute_pB_gain = use_param_info_gain and pB is not None
+    if compute_pA_gain:
+        wA = spm_wnorm_obj_arr(pA)
+    if compute_pB_gain:
+        wB = spm_wnorm_obj_arr(pB)
 
     for idx, policy in enumerate(policies):
         qs_pi = get_expected_states(qs, B, policy)
         qo_pi = get_expected_obs(qs_pi, A)
 
         if use_utility:
-            G[idx] += calc_expected_utility(qo_pi, C)
+            n_steps = policy.shape[0]
+            if n_steps not in C_prob_per_depth:
+                C_prob_per_depth[n_steps] = _tile_and_normalize_C(C, n_steps)
+            G[idx] += calc_expected_utility(qo_pi, C, C_prob_per_depth[n_steps])
 
         if use_states_info_gain:
             G[idx] += calc_states_info_gain(A, qs_pi)
 
-        if use_param_info_gain:
-            if pA is not None:
-                G[idx] += calc_pA_info_gain(pA, qo_pi, qs_pi)
-            if pB is not None:
-                G[idx] += calc_pB_info_gain(pB, qs_pi, qs, policy)
+        if compute_pA_gain:
+            G[idx] += calc_pA_info_gain(pA, qo_pi, qs_pi, wA)
+        if compute_pB_gain:
+            G[idx] += calc_pB_info_gain(pB, qs_pi, qs, policy, wB)
 
     q_pi = softmax(G * gamma + lnE)    
 
@@ -272,21 +297,39 @@ def get_expected_obs(qs_pi, A):
 
     n_steps = len(qs_pi) # each element of the list is the PPD at a different timestep
 
-    # initialise expected observations
+    # initialise and compute expected observations over time in a single pass
     qo_pi = []
 
     for t in range(n_steps):
         qo_pi_t = utils.obj_array(len(A))
-        qo_pi.append(qo_pi_t)
-
-    # compute expected observations over time
-    for t in range(n_steps):
         for modality, A_m in enumerate(A):
-            qo_pi[t][modality] = spm_dot(A_m, qs_pi[t])
+            qo_pi_t[modality] = spm_dot(A_m, qs_pi[t])
+        qo_pi.append(qo_pi_t)
 
     return qo_pi
 
-def calc_expected_utility(qo_pi, C):
+def _tile_and_normalize_C(C, n_steps):
+    """
+    Helper that tiles prior preferences across policy timesteps (where they are not tiled already) and
+    softmaxes them into proper probability distributions. The result depends only on ``C`` and the temporal
+    depth of the policy, so callers that score many policies of the same depth can compute it once and
+    pass it to ``calc_expected_utility`` for every policy.
+    """
+
+    num_modalities = len(C)
+
+    # reformat C to be tiled across timesteps, if it's not already. Modalities that are already tiled (2-D)
+    # can be referenced directly without copying, since the softmax below does not modify its input
+    C_tiled = utils.obj_array(num_modalities)
+    for modality in range(num_modalities):
+        if C[modality].ndim == 1:
+            C_tiled[modality] = np.tile(C[modality][:,None], (1, n_steps) )
+        else:
+            C_tiled[modality] = C[modality]
+
+    return softmax_obj_arr(C_tiled) # convert relative log probabilities into proper probability distribution
+
+def calc_expected_utility(qo_pi, C, C_prob=None):
     """
     Computes the expected utility of a policy, using the observation distribution expected under that policy and a prior preference vector.
 
@@ -296,8 +339,11 @@ def calc_expected_utility(qo_pi, C):
         Predictive posterior beliefs over observations expected under the policy, where ``qo_pi[t]`` stores the beliefs about
         observations expected under the policy at time ``t``
     C: ``numpy.ndarray`` of dtype object
-       Prior over observations or 'prior preferences', storing the "value" of each outcome in terms of relative log probabilities. 
+       Prior over observations or 'prior preferences', storing the "value" of each outcome in terms of relative log probabilities.
        This is softmaxed to form a proper probability distribution before being used to compute the expected utility.
+    C_prob: ``numpy.ndarray`` of dtype object, default ``None``
+        Optional pre-processed version of ``C``, already tiled across timesteps and normalized (the output of
+        ``_tile_and_normalize_C``). If ``None``, it is computed from ``C`` within this function.
 
     Returns
     -------
@@ -305,28 +351,23 @@ def calc_expected_utility(qo_pi, C):
         Utility (reward) expected under the policy in question
     """
     n_steps = len(qo_pi)
-    
+
     # initialise expected utility
     expected_util = 0
 
-    # loop over time points and modalities
+    # loop over modalities
     num_modalities = len(C)
 
-    # reformat C to be tiled across timesteps, if it's not already
-    modalities_to_tile = [modality_i for modality_i in range(num_modalities) if C[modality_i].ndim == 1]
-
-    # make a deepcopy of C where it has been tiled across timesteps
-    C_tiled = copy.deepcopy(C)
-    for modality in modalities_to_tile:
-        C_tiled[modality] = np.tile(C[modality][:,None], (1, n_steps) )
-    
-    C_prob = softmax_obj_arr(C_tiled) # convert relative log probabilities into proper probability distribution
+    if C_prob is None:
+        C_prob = _tile_and_normalize_C(C, n_steps)
 
-    for t in range(n_steps):
-        for modality in range(num_modalities):
+    for modality in range(num_modalities):
 
-            lnC = spm_log_single(C_prob[modality][:, t])
-            expected_util += qo_pi[t][modality].dot(lnC)
+        # take the log of the whole (num_obs x n_steps) preference matrix at once and contract it
+        # against the stacked expected observations, rather than slicing out one column per timestep
+        lnC = spm_log_single(C_prob[modality])
+        qo_m = np.stack([qo_pi[t][modality] for t in range(n_steps)], axis=1)
+        expected_util += np.sum(qo_m * lnC)
 
     return expected_util
 
@@ -361,7 +402,7 @@ def calc_states_info_gain(A, qs_pi):
     return states_surprise
 
 
-def calc_pA_info_gain(pA, qo_pi, qs_pi):
+def calc_pA_info_gain(pA, qo_pi, qs_pi, wA=None):
     """
     Compute expected Dirichlet information gain about parameters ``pA`` under a policy
 
@@ -375,6 +416,10 @@ def calc_pA_info_gain(pA, qo_pi, qs_pi):
     qs_pi: ``list`` of ``numpy.ndarray`` of dtype object
         Predictive posterior beliefs over hidden states expected under the policy, where ``qs_pi[t]`` stores the beliefs about
         hidden states expected under the policy at time ``t``
+    wA: ``numpy.ndarray`` of dtype object, default ``None``
+        Optional pre-computed expectation of the log of the Dirichlet parameters (the output of ``spm_wnorm_obj_arr(pA)``).
+        Since this only depends on ``pA``, callers that score many policies can compute it once and pass it in for every policy.
+        If ``None``, it is computed from ``pA`` within this function.
 
     Returns
     -------
@@ -383,23 +428,22 @@ def calc_pA_info_gain(pA, qo_pi, qs_pi):
     """
 
     n_steps = len(qo_pi)
-    
+
     num_modalities = len(pA)
-    wA = utils.obj_array(num_modalities)
-    for modality, pA_m in enumerate(pA):
-        wA[modality] = spm_wnorm(pA[modality])
+    if wA is None:
+        wA = spm_wnorm_obj_arr(pA)
 
     pA_infogain = 0
     
     for modality in range(num_modalities):
-        wA_modality = wA[modality] * (pA[modality] > 0).astype("float")
+        wA_modality = np.where(pA[modality] > 0, wA[modality], 0.0)
         for t in range(n_steps):
             pA_infogain -= qo_pi[t][modality].dot(spm_dot(wA_modality, qs_pi[t])[:, np.newaxis])
 
     return pA_infogain
 
 
-def calc_pB_info_gain(pB, qs_pi, qs_prev, policy):
+def calc_pB_info_gain(pB, qs_pi, qs_prev, policy, wB=None):
     """
     Compute expected Dirichlet information gain about parameters ``pB`` under a given policy
 
@@ -415,7 +459,11 @@ def calc_pB_info_gain(pB, qs_pi, qs_prev, policy):
     policy: 2D ``numpy.ndarray``
         Array that stores actions entailed by a policy over time. Shape is ``(num_timesteps, num_factors)`` where ``num_timesteps`` is the temporal
         depth of the policy and ``num_factors`` is the number of control factors.
-    
+    wB: ``numpy.ndarray`` of dtype object, default ``None``
+        Optional pre-computed expectation of the log of the Dirichlet parameters (the output of ``spm_wnorm_obj_arr(pB)``).
+        Since this only depends on ``pB``, callers that score many policies can compute it once and pass it in for every policy.
+        If ``None``, it is computed from ``pB`` within this function.
+
     Returns
     -------
     infogain_pB: float
@@ -425,9 +473,8 @@ def calc_pB_info_gain(pB, qs_pi, qs_prev, policy):
     n_steps = len(qs_pi)
 
     num_factors = len(pB)
-    wB = utils.obj_array(num_factors)
-    for factor, pB_f in enumerate(pB):
-        wB[factor] = spm_wnorm(pB_f)
+    if wB is None:
+        wB = spm_wnorm_obj_arr(pB)
 
     pB_infogain = 0
 
@@ -445,7 +492,7 @@ def calc_pB_info_gain(pB, qs_pi, qs_prev, policy):
         # get the list of action-indices for the current timestep
         policy_t = policy[t, :]
         for factor, a_i in enumerate(policy_t):
-            wB_factor_t = wB[factor][:, :, int(a_i)] * (pB[factor][:, :, int(a_i)] > 0).astype("float")
+            wB_factor_t = np.where(pB[factor][:, :, int(a_i)] > 0, wB[factor][:, :, int(a_i)], 0.0)
             pB_infogain -= qs_pi[t][factor].dot(wB_factor_t.dot(previous_qs[factor]))
 
     return pB_infogain
@@ -484,13 +531,33 @@ def construct_policies(num_states, num_controls = None, policy_len=1, control_fa
 
     if num_controls is None:
         num_controls = [num_states[c_idx] if c_idx in control_fac_idx else 1 for c_idx in range(num_factors)]
-        
-    x = num_controls * policy_len
-    policies = list(itertools.product(*[list(range(i)) for i in x]))
-    for pol_i in range(len(policies)):
-        policies[pol_i] = np.array(policies[pol_i]).reshape(policy_len, num_factors)
 
-    return policies
+    # the Cartesian product below only depends on (num_controls, policy_len), so memoize it - agents that are
+    # re-created with an identical control structure (e.g. once per episode in a training loop) reuse the cached
+    # policy space. Copies are returned so that callers remain free to mutate individual policies.
+    policies = _construct_policies_cached(tuple(num_controls), policy_len, num_factors)
+
+    return [policy.copy() for policy in policies]
+
+@lru_cache(maxsize=32)
+def _construct_policies_cached(num_controls, policy_len, num_factors):
+    """
+    Cached worker for ``construct_policies`` that enumerates the Cartesian product of action indices.
+    Takes ``num_controls`` as a ``tuple`` so the arguments are hashable.
+    """
+
+    x = list(num_controls) * policy_len
+    policies_tuples = list(itertools.product(*[list(range(i)) for i in x]))
+
+    # action indices are bounded by max(num_controls), so a small integer dtype suffices for almost
+    # every model, quartering the memory footprint of large policy spaces
+    dtype = np.int16 if max(num_controls, default=0) <= np.iinfo(np.int16).max else np.int64
+
+    # convert the whole Cartesian product to a single (num_policies x policy_len x num_factors) array at once,
+    # rather than running one np.array + reshape per policy
+    policies_arr = np.array(policies_tuples, dtype=dtype).reshape(len(policies_tuples), policy_len, num_factors)
+
+    return list(policies_arr)
     
 def get_num_controls_from_policies(policies):
     """
@@ -543,13 +610,12 @@ def sample_action(q_pi, policies, num_controls, action_selection="deterministic"
 
     num_factors = len(num_controls)
 
-    action_marginals = utils.obj_array_zeros(num_controls)
-
     # weight each action according to its integrated posterior probability under all policies at the current timestep
-    for pol_idx, policy in enumerate(policies):
-        for factor_i, action_i in enumerate(policy[0, :]):
-            action_marginals[factor_i][action_i] += q_pi[pol_idx]
-    
+    first_actions = np.array([policy[0] for policy in policies])
+    action_marginals = utils.obj_array(num_factors)
+    for factor_i in range(num_factors):
+        action_marginals[factor_i] = np.bincount(first_actions[:, factor_i], weights=q_pi, minlength=num_controls[factor_i])
+
     action_marginals = utils.norm_dist_obj_arr(action_marginals)
 
     selected_policy = np.zeros(num_factors)
@@ -601,13 +667,12 @@ def _sample_action_test(q_pi, policies, num_controls, action_selection="determin
 
     num_factors = len(num_controls)
 
-    action_marginals = utils.obj_array_zeros(num_controls)
-    
     # weight each action according to its integrated posterior probability under all policies at the current timestep
-    for pol_idx, policy in enumerate(policies):
-        for factor_i, action_i in enumerate(policy[0, :]):
-            action_marginals[factor_i][action_i] += q_pi[pol_idx]
-    
+    first_actions = np.array([policy[0] for policy in policies])
+    action_marginals = utils.obj_array(num_factors)
+    for factor_i in range(num_factors):
+        action_marginals[factor_i] = np.bincount(first_actions[:, factor_i], weights=q_pi, minlength=num_controls[factor_i])
+
     action_marginals = utils.norm_dist_obj_arr(action_marginals)
 
     selected_policy = np.zeros(num_factors)
@@ -650,8 +715,6 @@ def sample_policy(q_pi, policies, num_controls, action_selection="deterministic"
         Vector containing the indices of the actions for each control factor
     """
 
-    num_factors = len(num_controls)
-
     if action_selection == "deterministic":
         policy_idx = select_highest(q_pi)
     elif action_selection == "stochastic":
@@ -659,9 +722,8 @@ def sample_policy(q_pi, policies, num_controls, action_selection="deterministic"
         p_policies = softmax(log_qpi * alpha)
         policy_idx = utils.sample(p_policies)
 
-    selected_policy = np.zeros(num_factors)
-    for factor_i in range(num_factors):
-        selected_policy[factor_i] = policies[policy_idx][0, factor_i]
+    # the selected actions are just the first row of the selected policy, copied across all control factors at once
+    selected_policy = policies[policy_idx][0].astype(float)
 
     return selected_policy
 
@@ -695,8 +757,6 @@ def _sample_policy_test(q_pi, policies, num_controls, action_selection="determin
         Vector containing the indices of the actions for each control factor
     """
 
-    num_factors = len(num_controls)
-
     if action_selection == "deterministic":
         p_policies = q_pi
         policy_idx = _select_highest_test(p_policies, seed=seed)
@@ -705,9 +765,8 @@ def _sample_policy_test(q_pi, policies, num_controls, action_selection="determin
         p_policies = softmax(log_qpi * alpha)
         policy_idx = utils.sample(p_policies)
 
-    selected_policy = np.zeros(num_factors)
-    for factor_i in range(num_factors):
-        selected_policy[factor_i] = policies[policy_idx][0, factor_i]
+    # the selected actions are just the first row of the selected policy, copied across all control factors at once
+    selected_policy = policies[policy_idx][0].astype(float)
 
     return selected_policy, p_policies
 
@@ -724,9 +783,7 @@ def select_highest(options_array):
     -------
     The highest value in the given list
     """
-    options_with_idx = np.array(list(enumerate(options_array)))
-    same_prob = options_with_idx[
-                    abs(options_with_idx[:, 1] - np.amax(options_with_idx[:, 1])) <= 1e-8][:, 0]
+    same_prob = np.flatnonzero(np.abs(options_array - np.amax(options_array)) <= 1e-8)
     if len(same_prob) > 1:
         # If some of the most likely actions have nearly equal probability, sample from this subset of actions, instead of using argmax
         return int(same_prob[np.random.choice(len(same_prob))])
@@ -745,9 +802,7 @@ def _select_highest_test(options_array, seed=None):
     -------
     The highest value in the given list
     """
-    options_with_idx = np.array(list(enumerate(options_array)))
-    same_prob = options_with_idx[
-                    abs(options_with_idx[:, 1] - np.amax(options_with_idx[:, 1])) <= 1e-8][:, 0]
+    same_prob = np.flatnonzero(np.abs(options_array - np.amax(options_array)) <= 1e-8)
     if len(same_prob) > 1:
         # If some of the most likely actions have nearly equal probability, sample from this subset of actions, instead of using argmax
         rng = np.random.default_rng(seed)
@@ -123,12 +123,12 @@ class GridWorldEnv(Env):
             _ = sns.heatmap(values, cmap="OrRd", linewidth=2.5, cbar=False, ax=ax)
         plt.xticks(range(self.shape[1]))
         plt.yticks(range(self.shape[0]))
-        if title != None:
+        if title is not None:
             plt.title(title)
         plt.show()
 
     def set_init_state(self, init_state=None):
-        if init_state != None:
+        if init_state is not None:
             if init_state > (self.n_states - 1) or init_state < 0:
                 raise ValueError("`init_state` is greater than number of states")
             if not isinstance(init_state, (int, float)):
@@ -166,7 +166,7 @@ class GridWorldEnv(Env):
 
     def get_init_state_dist(self, init_state=None):
         init_state_dist = np.zeros(self.n_states)
-        if init_state == None:
+        if init_state is None:
             init_state_dist[self.init_state] = 1.0
         else:
             init_state_dist[init_state] = 1.0
@@ -237,12 +237,12 @@ class DGridWorldEnv(object):
             _ = sns.heatmap(values, cmap="OrRd", linewidth=2.5, cbar=False, ax=ax)
         plt.xticks(range(self.shape[1]))
         plt.yticks(range(self.shape[0]))
-        if title != None:
+        if title is not None:
             plt.title(title)
         plt.show()
 
     def set_init_state(self, init_state=None):
-        if init_state != None:
+        if init_state is not None:
             if init_state > (self.n_states - 1) or init_state < 0:
                 raise ValueError("`init_state` is greater than number of states")
             if not isinstance(init_state, (int, float)):
@@ -276,7 +276,7 @@ class DGridWorldEnv(object):
 
     def get_init_state_dist(self, init_state=None):
         init_state_dist = np.zeros(self.n_states)
-        if init_state == None:
+        if init_state is None:
             init_state_dist[self.init_state] = 1.0
         else:
             init_state_dist[init_state] = 1.0
@@ -5,7 +5,7 @@
 import numpy as np
 
 from pymdp import utils
-from pymdp.maths import get_joint_likelihood_seq
+from pymdp.maths import get_joint_likelihood_seq, spm_norm
 from pymdp.algos import run_vanilla_fpi, run_mmp, _run_mmp_testing
 
 VANILLA = "VANILLA"
@@ -69,6 +69,11 @@ def update_posterior_states_full(
     if prev_actions is not None:
         prev_actions = np.stack(prev_actions,0)
 
+    # the transpose-normalized transition model is shared by every policy, so compute it once here
+    trans_B = utils.obj_array(num_factors)
+    for f in range(num_factors):
+        trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
+
     qs_seq_pi = utils.obj_array(len(policies))
     F = np.zeros(len(policies)) # variational free energy of policies
 
@@ -80,7 +85,8 @@ def update_posterior_states_full(
                 B,
                 policy,
                 prev_actions=prev_actions,
-                prior= prior[p_idx] if policy_sep_prior else prior, 
+                prior= prior[p_idx] if policy_sep_prior else prior,
+                trans_B=trans_B,
                 **kwargs
             )
 
@@ -145,6 +151,11 @@ def _update_posterior_states_full_test(
     if prev_actions is not None:
         prev_actions = np.stack(prev_actions,0)
 
+    # the transpose-normalized transition model is shared by every policy, so compute it once here
+    trans_B = utils.obj_array(num_factors)
+    for f in range(num_factors):
+        trans_B[f] = spm_norm(np.swapaxes(B[f],0,1))
+
     qs_seq_pi = utils.obj_array(len(policies))
     xn_seq_pi = utils.obj_array(len(policies))
     vn_seq_pi = utils.obj_array(len(policies))
@@ -158,7 +169,8 @@ def _update_posterior_states_full_test(
                 B,
                 policy,
                 prev_actions=prev_actions,
-                prior=prior[p_idx] if policy_sep_prior else prior, 
+                prior=prior[p_idx] if policy_sep_prior else prior,
+                trans_B=trans_B,
                 **kwargs
             )
 
@@ -185,21 +197,19 @@ def average_states_over_policies(qs_pi, q_pi):
     """
 
     num_factors = len(qs_pi[0]) # get the number of hidden state factors using the shape of the first-policy-conditioned posterior
-    num_states = [qs_f.shape[0] for qs_f in qs_pi[0]] # get the dimensionalities of each hidden state factor 
+    num_policies = len(qs_pi)
+
+    policy_weights = np.asarray(q_pi).flatten()
 
     qs_bma = utils.obj_array(num_factors)
     for f in range(num_factors):
-        qs_bma[f] = np.zeros(num_states[f])
-
-    for p_idx, policy_weight in enumerate(q_pi):
-
-        for f in range(num_factors):
-
-            qs_bma[f] += qs_pi[p_idx][f] * policy_weight
+        # stack the policy-conditioned marginals for this factor into a (num_policies x num_states[f]) array
+        # and average them with a single matrix-vector product
+        qs_bma[f] = policy_weights @ np.stack([qs_pi[p_idx][f] for p_idx in range(num_policies)])
 
     return qs_bma
 
-def update_posterior_states(A, obs, prior=None, **kwargs):
+def update_posterior_states(A, obs, prior=None, num_obs=None, num_states=None, **kwargs):
     """
     Update marginal posterior over hidden states using mean-field fixed point iteration 
     FPI or Fixed point iteration. 
@@ -222,7 +232,13 @@ def update_posterior_states(A, obs, prior=None, **kwargs):
         Prior beliefs about hidden states, to be integrated with the marginal likelihood to obtain
         a posterior distribution. If not provided, prior is set to be equal to a flat categorical distribution (at the level of
         the individual inference functions).
-    **kwargs: keyword arguments 
+    num_obs: ``list`` of ``int``, default None
+        Dimensionalities of each observation modality. Callers that invoke this function repeatedly with a fixed
+        generative model (e.g. once per timestep) can pass this in to skip re-deriving it from ``A``.
+    num_states: ``list`` of ``int``, default None
+        Dimensionalities of each hidden state factor. As with ``num_obs``, can be passed in to skip
+        re-deriving it from ``A``.
+    **kwargs: keyword arguments
         List of keyword/parameter arguments corresponding to parameter values for the fixed-point iteration
         algorithm ``algos.fpi.run_vanilla_fpi.py``
 
@@ -232,8 +248,11 @@ def update_posterior_states(A, obs, prior=None, **kwargs):
         Marginal posterior beliefs over hidden states at current timepoint
     """
 
-    num_obs, num_states, num_modalities, num_factors = utils.get_model_dimensions(A = A)
-    
+    if num_obs is None or num_states is None:
+        num_obs, num_states, num_modalities, _ = utils.get_model_dimensions(A = A)
+    else:
+        num_modalities = len(num_obs)
+
     obs = utils.process_observation(obs, num_modalities, num_obs)
 
     if prior is not None:
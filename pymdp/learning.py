@@ -4,7 +4,6 @@
 
 import numpy as np
 from pymdp import utils, maths
-import copy
 
 def update_obs_likelihood_dirichlet(pA, A, obs, qs, lr=1.0, modalities="all"):
     """ 
@@ -40,7 +39,7 @@ def update_obs_likelihood_dirichlet(pA, A, obs, qs, lr=1.0, modalities="all"):
 
 
     num_modalities = len(pA)
-    num_observations = [pA[modality].shape[0] for modality in range(num_modalities)]
+    num_observations = [pA_m.shape[0] for pA_m in pA]
 
     obs_processed = utils.process_observation(obs, num_modalities, num_observations)
     obs = utils.to_obj_array(obs_processed)
@@ -48,11 +47,13 @@ def update_obs_likelihood_dirichlet(pA, A, obs, qs, lr=1.0, modalities="all"):
     if modalities == "all":
         modalities = list(range(num_modalities))
 
-    qA = copy.deepcopy(pA)
+    qA = utils.obj_array(num_modalities)
+    for modality, pA_m in enumerate(pA):
+        qA[modality] = pA_m.copy()
         
     for modality in modalities:
         dfda = maths.spm_cross(obs[modality], qs)
-        dfda = dfda * (A[modality] > 0).astype("float")
+        dfda = dfda * (A[modality] > 0)
         qA[modality] = qA[modality] + (lr * dfda)
 
     return qA
@@ -93,14 +94,16 @@ def update_state_likelihood_dirichlet(
 
     num_factors = len(pB)
 
-    qB = copy.deepcopy(pB)
+    qB = utils.obj_array(num_factors)
+    for factor, pB_f in enumerate(pB):
+        qB[factor] = pB_f.copy()
    
     if factors == "all":
         factors = list(range(num_factors))
 
     for factor in factors:
         dfdb = maths.spm_cross(qs[factor], qs_prev[factor])
-        dfdb *= (B[factor][:, :, int(actions[factor])] > 0).astype("float")
+        dfdb *= (B[factor][:, :, int(actions[factor])] > 0)
         qB[factor][:,:,int(actions[factor])] += (lr*dfdb)
 
     return qB
@@ -133,7 +136,9 @@ def update_state_prior_dirichlet(
 
     num_factors = len(pD)
 
-    qD = copy.deepcopy(pD)
+    qD = utils.obj_array(num_factors)
+    for factor, pD_f in enumerate(pD):
+        qD[factor] = pD_f.copy()
    
     if factors == "all":
         factors = list(range(num_factors))
@@ -309,7 +314,7 @@ def _prune_B(B, state_levels_to_prune, action_levels_to_prune, dirichlet = False
 
     if utils.is_obj_array(B):
 
-        num_controls = [B_arr.shape[2] for _, B_arr in enumerate(B)]
+        num_controls = [B_arr.shape[2] for B_arr in B]
 
         for c, nc in enumerate(num_controls):
             indices_c = np.array( list(set(range(nc)) - set(action_levels_to_prune[c])), dtype = np.intp)
@@ -238,10 +238,12 @@ def get_joint_likelihood(A, obs, num_states):
         num_states = [num_states]
     A = utils.to_obj_array(A)
     obs = utils.to_obj_array(obs)
-    ll = np.ones(tuple(num_states))
-    for modality in range(len(A)):
+    # seed the joint likelihood with the first modality's likelihood rather than multiplying into a ones-tensor
+    ll = dot_likelihood(A[0], obs[0])
+    for modality in range(1, len(A)):
         ll = ll * dot_likelihood(A[modality], obs[modality])
-    return ll
+    # reshape restores any singleton hidden state dimensions squeezed out by `dot_likelihood`
+    return ll.reshape(tuple(num_states))
 
 
 def get_joint_likelihood_seq(A, obs, num_states):
@@ -278,8 +280,8 @@ def spm_log_obj_array(obj_arr):
     return obj_arr_logged
 
 def spm_wnorm(A):
-    """ 
-    Returns Expectation of logarithm of Dirichlet parameters over a set of 
+    """
+    Returns Expectation of logarithm of Dirichlet parameters over a set of
     Categorical distributions, stored in the columns of A.
     """
     A = A + EPS_VAL
@@ -288,6 +290,17 @@ def spm_wnorm(A):
     wA = norm - avg
     return wA
 
+def spm_wnorm_obj_arr(obj_arr):
+    """
+    Applies `spm_wnorm` to multiple elements of a numpy object array
+    """
+
+    wnormed_obj_array = utils.obj_array(len(obj_arr))
+    for idx, arr in enumerate(obj_arr):
+        wnormed_obj_array[idx] = spm_wnorm(arr)
+
+    return wnormed_obj_array
+
 
 def spm_betaln(z):
     """ Log of the multivariate beta function of a vector.
@@ -403,7 +416,8 @@ def spm_MDP_G(A, x):
     qx = spm_cross(x)
     G = 0
     qo = 0
-    idx = np.array(np.where(qx > np.exp(-16))).T
+    eps = np.exp(-16) # compute the cutoff constant once, rather than re-exponentiating inside the loops below
+    idx = np.array(np.where(qx > eps)).T
 
     if utils.is_obj_array(A):
         # Accumulate expectation of entropy: i.e., E_{Q(o, s)}[lnP(o|x)]
@@ -416,7 +430,7 @@ def spm_MDP_G(A, x):
 
             po = po.ravel()
             qo += qx[tuple(i)] * po
-            G += qx[tuple(i)] * po.dot(np.log(po + np.exp(-16)))
+            G += qx[tuple(i)] * po.dot(np.log(po + eps))
     else:
         for i in idx:
             po = np.ones(1)
@@ -424,8 +438,8 @@ def spm_MDP_G(A, x):
             po = spm_cross(po, A[tuple(index_vector)])
             po = po.ravel()
             qo += qx[tuple(i)] * po
-            G += qx[tuple(i)] * po.dot(np.log(po + np.exp(-16)))
-   
+            G += qx[tuple(i)] * po.dot(np.log(po + eps))
+
     # Subtract negative entropy of expectations: i.e., E_{Q(o)}[lnQ(o)]
     G = G - qo.dot(spm_log_single(qo))  # type: ignore
 
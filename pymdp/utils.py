@@ -72,7 +72,8 @@ def obj_array_uniform(shape_list):
     """
     arr = obj_array(len(shape_list))
     for i, shape in enumerate(shape_list):
-        arr[i] = norm_dist(np.ones(shape))
+        leading_dim = shape if isinstance(shape, int) else shape[0]
+        arr[i] = np.full(shape, 1.0 / leading_dim)
     return arr
 
 def obj_array_ones(shape_list, scale = 1.0):